@@ -4,6 +4,9 @@ from uuid import UUID, uuid4
 
 
 class Document:
+    # no per-instance __dict__, as Documents are created in large numbers for every query
+    __slots__ = ("text", "id", "query_score", "question", "meta", "tags", "embedding")
+
     def __init__(self, text: str,
                  id: Optional[Union[str, UUID]] = None,
                  query_score: Optional[float] = None,
@@ -45,7 +48,7 @@ class Document:
         self.embedding = embedding
 
     def to_dict(self):
-        return self.__dict__
+        return {name: getattr(self, name) for name in self.__slots__}
 
     @classmethod
     def from_dict(cls, dict):
@@ -1,11 +1,18 @@
-import json
 import logging
-import time
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
 from string import Template
-from typing import List, Optional, Union, Dict, Any
+from typing import List, Optional, Union, Dict, Any, Iterable, Iterator, Sequence, Set, Tuple, Type, cast
 from elasticsearch import Elasticsearch
-from elasticsearch.helpers import bulk, scan
+from elasticsearch.exceptions import HTTP_EXCEPTIONS, SerializationError, TransportError
+from elasticsearch.helpers import BulkIndexError, parallel_bulk, scan
+from elasticsearch.serializer import JSONSerializer
 import numpy as np
+import orjson
 from uuid import UUID
 
 from haystack.database.base import BaseDocumentStore, Document, Label
@@ -13,6 +20,77 @@ from haystack.indexing.utils import eval_data_from_file
 
 logger = logging.getLogger(__name__)
 
+# (id, score, text) of a search hit, returned by the `*_raw()` query methods
+RawHit = Tuple[str, Optional[float], Optional[str]]
+
+# multiple embeddings, either as list of vectors or as matrix with one row per embedding
+Embeddings = Union[Sequence[Union[List[float], np.ndarray]], np.ndarray]
+
+# min. number of embeddings to calibrate the value ranges of the int8 quantization on
+MIN_INT8_CALIBRATION_SIZE = 100
+
+
+class OrjsonSerializer(JSONSerializer):
+    """
+    Serializer for the Elasticsearch client using orjson, which is considerably faster than the json module
+    and serializes numpy arrays (e.g. embeddings) natively without converting them to lists first.
+    """
+
+    def loads(self, s):
+        try:
+            return orjson.loads(s)
+        except (ValueError, TypeError) as e:
+            raise SerializationError(s, e)
+
+    def dumps(self, data):
+        # don't serialize strings
+        if isinstance(data, str):
+            return data
+
+        try:
+            return orjson.dumps(
+                data, default=self.default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            ).decode()
+        except (ValueError, TypeError) as e:
+            raise SerializationError(data, e)
+
+
+def _put_until_stopped(q: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    # put with a timeout, so that a producer thread doesn't block forever once its consumer is gone
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _copy_without_embedding(document: Document) -> Document:
+    return Document(
+        text=document.text,
+        id=document.id,
+        query_score=document.query_score,
+        question=document.question,
+        meta=dict(document.meta) if document.meta is not None else None,
+        tags=dict(document.tags) if document.tags is not None else None,
+    )
+
+
+def _get_filter_clause(filters: Dict[str, List]) -> List[Dict[str, Any]]:
+    for key, values in filters.items():
+        if type(values) != list:
+            raise ValueError(f'Wrong filter format for key "{key}": Please provide a list of allowed values for each key. '
+                             'Example: {"name": ["some", "more"], "category": ["only_one"]} ')
+    # build a new clause on every call, callers are free to extend the query body it ends up in
+    return [{"terms": {key: list(values)}} for key, values in filters.items()]
+
+
+@lru_cache(maxsize=32)
+def _get_query_template(custom_query: str) -> Template:
+    # the same custom query is usually used for all queries of a retriever, so we only compile it once
+    return Template(custom_query)
+
 
 class ElasticsearchDocumentStore(BaseDocumentStore):
     def __init__(
@@ -34,7 +112,13 @@ class ElasticsearchDocumentStore(BaseDocumentStore):
         scheme: str = "http",
         ca_certs: bool = False,
         verify_certs: bool = True,
-        create_index: bool = True
+        create_index: bool = True,
+        similarity: Optional[str] = None,
+        quantization: Optional[str] = None,
+        query_cache_size: int = 0,
+        query_cache_threshold: float = 0.97,
+        preference: Optional[str] = "_local",
+        vector_precision: str = "float"
     ):
         """
         A DocumentStore using Elasticsearch to store and query the documents for our search.
@@ -61,9 +145,36 @@ class ElasticsearchDocumentStore(BaseDocumentStore):
         :param ca_certs: Root certificates for SSL
         :param verify_certs: Whether to be strict about ca certificates
         :param create_index: Whether to try creating a new index (If the index of that name is already existing, we will just continue in any case)
+        :param similarity: Similarity function used by Elasticsearch to compare embeddings, e.g. "cosine" (default)
+                           or "dot_product". Binary embeddings are always compared via "l2_norm" (hamming distance).
+        :param quantization: Type of HNSW index used for the embeddings. Options: "hnsw" (uncompressed float32),
+                             "int8_hnsw" (4x less memory, requires Elasticsearch >= 8.12), "int4_hnsw" (8x less memory,
+                             requires Elasticsearch >= 8.15), "bbq_hnsw" (32x less memory, requires Elasticsearch >= 8.16
+                             and an `embedding_dim` of at least 64). Defaults to "int8_hnsw" for float embeddings
+                             and to "hnsw" otherwise.
+        :param query_cache_size: Max. number of `query_by_embedding()` results kept in an in-process LRU cache
+                                 (disabled by default). Only writes through this DocumentStore clear the cache,
+                                 so only enable it if no other client modifies the index. Cached results are
+                                 returned without embeddings.
+        :param query_cache_threshold: Min. cosine similarity between a query embedding and a cached one to reuse
+                                      the cached results.
+        :param preference: Shard copies that read requests are routed to (Elasticsearch's `preference` param).
+                           The default "_local" prefers shards on the node that receives the request to avoid extra hops.
+        :param vector_precision: Precision of the embeddings that are sent to and stored in Elasticsearch.
+                                 Options: "float" (float32), "int8" (scalar quantized bytes, 4x smaller) or
+                                 "binary" (one bit per dimension, 32x smaller, requires an `embedding_dim` divisible by 8).
+                                 For "int8", the value ranges per dimension are calibrated on the first embeddings
+                                 written to the index (or on the first batch of `update_embeddings()`) and stored in the
+                                 index mapping, so queries are quantized alike. Until 100 embeddings were written, the
+                                 range [-1, 1] of normalized embeddings is used and these docs are quantized again once
+                                 the ranges are calibrated.
+                                 The `quantization` option only applies to "float".
+                                 Note that documents fetched with `include_embedding=True` hold the stored, quantized
+                                 embeddings: int8 values per dimension or, for "binary", the bits packed into int8 values.
         """
         self.client = Elasticsearch(hosts=[{"host": host, "port": port}], http_auth=(username, password),
-                                    scheme=scheme, ca_certs=ca_certs, verify_certs=verify_certs)
+                                    scheme=scheme, ca_certs=ca_certs, verify_certs=verify_certs,
+                                    http_compress=True, serializer=OrjsonSerializer(), maxsize=25)
 
         # configure mappings to ES fields that will be used for querying / displaying results
         if type(search_fields) == str:
@@ -76,15 +187,55 @@ class ElasticsearchDocumentStore(BaseDocumentStore):
         self.name_field = name_field
         self.embedding_field = embedding_field
         self.embedding_dim = embedding_dim
+        if vector_precision not in ("float", "int8", "binary"):
+            raise ValueError(f"Unknown vector_precision '{vector_precision}'. Options: 'float', 'int8', 'binary'")
+        if vector_precision == "binary":
+            if embedding_dim % 8 != 0:
+                raise ValueError(f"vector_precision 'binary' requires an embedding_dim divisible by 8 (got {embedding_dim}).")
+            # Elasticsearch compares bit vectors by their hamming distance only
+            if similarity not in (None, "l2_norm"):
+                raise ValueError(f"vector_precision 'binary' only supports similarity 'l2_norm' (got '{similarity}').")
+            similarity = "l2_norm"
+        if vector_precision != "float":
+            # byte and bit vectors are already quantized, only the plain HNSW index applies to them
+            if quantization not in (None, "hnsw"):
+                raise ValueError(f"vector_precision '{vector_precision}' only supports quantization 'hnsw' "
+                                 f"(got '{quantization}').")
+            quantization = "hnsw"
+        similarity = similarity or "cosine"
+        quantization = quantization or "int8_hnsw"
+        self.vector_precision = vector_precision
+        # value ranges per dimension used for the int8 quantization, per index
+        self._int8_ranges: Dict[str, np.ndarray] = {}
+        # (id, embedding) of the docs that were written before enough embeddings were seen to calibrate on, per index
+        self._int8_uncalibrated: Dict[str, List[Tuple[Any, Any]]] = {}
+        self.similarity = similarity
+        if quantization == "bbq_hnsw" and embedding_dim < 64:
+            raise ValueError(f"Quantization 'bbq_hnsw' requires an embedding_dim of at least 64 (got {embedding_dim}).")
+        self.quantization = quantization
         self.excluded_meta_data = excluded_meta_data
         self.faq_question_field = faq_question_field
+        self.preference = preference
+        # fields of the _source that are mapped to Document attributes instead of the meta data
+        self._excluded_source_keys = frozenset({text_field, faq_question_field, embedding_field, "tags"} - {None})
+
+        # cache of query_by_embedding() results: maps (index, top_k, filters, sign pattern of the query embedding)
+        # to (normalized query embedding, documents)
+        self.query_cache_size = query_cache_size
+        self.query_cache_threshold = query_cache_threshold
+        self._query_cache: OrderedDict = OrderedDict()
+        self._query_cache_lock = threading.Lock()
 
         self.custom_mapping = custom_mapping
+        # names of indices that are known to exist (saves a roundtrip to Elasticsearch on every write)
+        self._known_indices: Set[str] = set()
         if create_index:
             self._create_document_index(index)
+            self._known_indices.add(index)
         self.index: str = index
 
         self._create_label_index(label_index)
+        self._known_indices.add(label_index)
         self.label_index = label_index
 
     def _create_document_index(self, index_name):
@@ -100,8 +251,19 @@ class ElasticsearchDocumentStore(BaseDocumentStore):
                 }
             }
             if self.embedding_field:
-                mapping["mappings"]["properties"][self.embedding_field] = {"type": "dense_vector", "dims": self.embedding_dim}
-        self.client.indices.create(index=index_name, ignore=400, body=mapping)
+                # index the vectors in a HNSW graph so that query_by_embedding() can use approximate kNN search
+                mapping["mappings"]["properties"][self.embedding_field] = {
+                    "type": "dense_vector",
+                    "dims": self.embedding_dim,
+                    "index": True,
+                    "similarity": self.similarity,
+                    "index_options": {"type": self.quantization, "m": 16, "ef_construction": 64},
+                }
+                if self.vector_precision == "int8":
+                    mapping["mappings"]["properties"][self.embedding_field]["element_type"] = "byte"
+                elif self.vector_precision == "binary":
+                    mapping["mappings"]["properties"][self.embedding_field]["element_type"] = "bit"
+        self._create_index(index_name, mapping)
 
     def _create_label_index(self, index_name):
         mapping = {
@@ -120,13 +282,36 @@ class ElasticsearchDocumentStore(BaseDocumentStore):
                 }
             }
         }
-        self.client.indices.create(index=index_name, ignore=400, body=mapping)
+        self._create_index(index_name, mapping)
+
+    def _create_index(self, index_name: str, mapping: dict):
+        response = self.client.indices.create(index=index_name, ignore=400, body=mapping)
+        # an existing index is fine, any other 400 (e.g. an index_options type unknown to the cluster) is not
+        error = response.get("error") if isinstance(response, dict) else None
+        if not error or (isinstance(error, dict) and error.get("type") == "resource_already_exists_exception"):
+            return
+        raise RuntimeError(f"Could not create index '{index_name}' in Elasticsearch: {error}")
+
+    def _ensure_document_index(self, index: str):
+        if index in self._known_indices:
+            return
+        if not self.client.indices.exists(index=index):
+            self._create_document_index(index)
+        self._known_indices.add(index)
+
+    def _ensure_label_index(self, index: str):
+        if index in self._known_indices:
+            return
+        if not self.client.indices.exists(index=index):
+            self._create_label_index(index)
+        self._known_indices.add(index)
 
     def get_document_by_id(self, id: Union[UUID, str], index=None) -> Optional[Document]:
         if index is None:
             index = self.index
         query = {"query": {"ids": {"values": [id]}}}
-        result = self.client.search(index=index, body=query)["hits"]["hits"]
+        result = self.client.search(index=index, body=query, preference=self.preference,
+                                    request_cache=True)["hits"]["hits"]
 
         document = self._convert_es_hit_to_document(result[0]) if result else None
         return document
@@ -136,10 +321,9 @@ class ElasticsearchDocumentStore(BaseDocumentStore):
         term_queries = [{"terms": {key: value}} for key, value in tags.items()]
         query = {"query": {"bool": {"must": term_queries}}}
         logger.debug(f"Tag filter query: {query}")
-        result = self.client.search(index=index, body=query, size=10000)["hits"]["hits"]
-        doc_ids = []
-        for hit in result:
-            doc_ids.append(hit["_id"])
+        # we only need the ids: skip the _source and scroll over all hits instead of truncating at 10k results
+        result = scan(self.client, index=index, query=query, _source=False, size=1000, preference=self.preference)
+        doc_ids = [hit["_id"] for hit in result]
         return doc_ids
 
     def write_documents(self, documents: Union[List[dict], List[Document]], index: Optional[str] = None):
@@ -157,61 +341,90 @@ class ElasticsearchDocumentStore(BaseDocumentStore):
         :return: None
         """
 
-        if index and not self.client.indices.exists(index=index):
-            self._create_document_index(index)
+        if index:
+            self._ensure_document_index(index)
 
         if index is None:
             index = self.index
 
-        # Make sure we comply to Document class format
-        documents_objects = [Document.from_dict(d) if isinstance(d, dict) else d for d in documents]
-
-        documents_to_index = []
-        for doc in documents_objects:
-
-            _doc = {
-                "_op_type": "create",
-                "_index": index,
-                **doc.to_dict()
-            }  # type: Dict[str, Any]
-
-            # rename id for elastic
-            _doc["_id"] = str(_doc.pop("id"))
-
-            # don't index query score and empty fields
-            _ = _doc.pop("query_score", None)
-            _doc = {k:v for k,v in _doc.items() if v is not None}
-
-            # In order to have a flat structure in elastic + similar behaviour to the other DocumentStores,
-            # we "unnest" all value within "meta"
-            if "meta" in _doc.keys():
-                for k, v in _doc["meta"].items():
-                    _doc[k] = v
-                _doc.pop("meta")
-            documents_to_index.append(_doc)
-        bulk(self.client, documents_to_index, request_timeout=300, refresh="wait_for")
+        requantize = []  # type: List[Tuple[Any, Any]]
+        if self.vector_precision == "int8":
+            # calibrate the int8 quantization on the embeddings of the docs (unless the index has one already)
+            documents = [Document.from_dict(d) if isinstance(d, dict) else d for d in documents]
+            samples = [(doc.id, doc.embedding) for doc in documents if doc.embedding is not None]
+            if samples:
+                requantize = self._calibrate_int8_ranges(index, samples)
+
+        skipped_keys = ("id", "query_score", "meta")
+
+        def _documents_to_index():
+            for doc in documents:
+                # Make sure we comply to Document class format
+                if isinstance(doc, dict):
+                    doc = Document.from_dict(doc)
+
+                doc_dict = doc.to_dict()
+
+                # rename id for elastic (the UUID is converted to a string natively by the OrjsonSerializer)
+                _doc = {
+                    "_op_type": "create",
+                    "_index": index,
+                    "_id": doc_dict["id"],
+                }  # type: Dict[str, Any]
+
+                # don't index query score and empty fields
+                _doc.update((k, v) for k, v in doc_dict.items() if v is not None and k not in skipped_keys)
+                if self.vector_precision != "float" and doc_dict["embedding"] is not None:
+                    _doc["embedding"] = self._embeddings_to_payload([doc_dict["embedding"]], index)[0]
+
+                # In order to have a flat structure in elastic + similar behaviour to the other DocumentStores,
+                # we "unnest" all value within "meta"
+                meta = doc_dict.get("meta")
+                if meta:
+                    _doc.update(meta)
+                yield _doc
+
+        self._bulk(_documents_to_index())
+        if requantize:
+            ids, embeddings = zip(*requantize)
+            self._write_embeddings_batch(list(ids), self._embeddings_to_payload(embeddings, index), index)
+        self.client.indices.refresh(index=index)
+        self._clear_query_cache()
 
     def write_labels(self, labels: Union[List[Label], List[dict]], index: Optional[str] = "label"):
-        if index and not self.client.indices.exists(index=index):
-            self._create_label_index(index)
+        if index:
+            self._ensure_label_index(index)
 
         # Make sure we comply to Label class format
-        label_objects = [Label.from_dict(l) if isinstance(l, dict) else l for l in labels]
+        label_objects = (Label.from_dict(l) if isinstance(l, dict) else l for l in labels)
 
-        labels_to_index = []
-        for label in label_objects:
-            _label = {
+        labels_to_index = (
+            {
                 "_op_type": "create",
                 "_index": index,
                 **label.to_dict()
-            }  # type: Dict[str, Any]
-
-            labels_to_index.append(_label)
-        bulk(self.client, labels_to_index, request_timeout=300, refresh="wait_for")
+            }
+            for label in label_objects
+        )
+        self._bulk(labels_to_index)
+        self.client.indices.refresh(index=index)
+
+    def _bulk(self, actions: Iterable[Dict[str, Any]]):
+        # No refresh per chunk here: callers refresh the index once after all actions have been sent.
+        # Failed actions don't stop the others, they are all logged and raised together at the end.
+        errors = []
+        for ok, info in parallel_bulk(self.client, actions, thread_count=4, chunk_size=1000, queue_size=4,
+                                      raise_on_error=False, request_timeout=300):
+            if not ok:
+                logger.error(info)
+                errors.append(info)
+        if errors:
+            raise BulkIndexError(f"{len(errors)} document(s) failed to index.", errors)
 
     def update_document_meta(self, id: str, meta: Dict[str, str]):
         body = {"doc": meta}
-        self.client.update(index=self.index, doc_type="_doc", id=id, body=body, refresh="wait_for")
+        self.client.update(index=self.index, id=id, body=body, refresh="wait_for")
+        self._clear_query_cache()
 
     def get_document_count(self, index: Optional[str] = None) -> int:
         if index is None:
@@ -223,21 +436,59 @@ class ElasticsearchDocumentStore(BaseDocumentStore):
     def get_label_count(self, index: Optional[str] = None) -> int:
         return self.get_document_count(index=index)
 
-    def get_all_documents(self, index: Optional[str] = None, filters: Optional[dict] = None) -> List[Document]:
+    def get_all_documents(
+        self,
+        index: Optional[str] = None,
+        filters: Optional[dict] = None,
+        include_embedding: bool = False
+    ) -> List[Document]:
+        """
+        Get all documents from the index. See `get_all_documents_generator()` for iterating over huge indices
+        without loading all documents into memory.
+
+        :param index: Name of the index to get the documents from. If None, the DocumentStore's default index (self.index) will be used.
+        :param filters: Optional filters to narrow down the documents to return, e.g. {"name": ["some", "more"]}
+        :param include_embedding: Whether to return the document embeddings.
+        """
+        return list(self.get_all_documents_generator(index=index, filters=filters, include_embedding=include_embedding))
+
+    def get_all_documents_generator(
+        self,
+        index: Optional[str] = None,
+        filters: Optional[dict] = None,
+        include_embedding: bool = False
+    ) -> Iterator[Document]:
+        """
+        Get all documents from the index as a generator. The documents are fetched lazily via Elasticsearch's
+        scroll API, so only one page of documents is held in memory at a time.
+
+        :param index: Name of the index to get the documents from. If None, the DocumentStore's default index (self.index) will be used.
+        :param filters: Optional filters to narrow down the documents to return, e.g. {"name": ["some", "more"]}
+        :param include_embedding: Whether to return the document embeddings. Skipping them avoids shipping large vectors over the wire.
+                                  With a `vector_precision` other than "float", these are the quantized embeddings.
+        """
         if index is None:
             index = self.index
 
-        result = self.get_all_documents_in_index(index=index, filters=filters)
-        documents = [self._convert_es_hit_to_document(hit) for hit in result]
+        source_excludes = None
+        if self.embedding_field and not include_embedding:
+            source_excludes = [self.embedding_field]
 
-        return documents
+        result = self.get_all_documents_in_index(index=index, filters=filters, source_excludes=source_excludes)
+        for hit in result:
+            yield self._convert_es_hit_to_document(hit)
 
     def get_all_labels(self, index: str = "label", filters: Optional[dict] = None) -> List[Label]:
         result = self.get_all_documents_in_index(index=index, filters=filters)
         labels = [Label.from_dict(hit["_source"]) for hit in result]
         return labels
 
-    def get_all_documents_in_index(self, index: str, filters: Optional[dict] = None) -> List[dict]:
+    def get_all_documents_in_index(
+        self,
+        index: str,
+        filters: Optional[dict] = None,
+        source_excludes: Optional[List[str]] = None
+    ) -> Iterator[dict]:
         body = {
             "query": {
                 "bool": {
@@ -249,15 +500,8 @@ class ElasticsearchDocumentStore(BaseDocumentStore):
         }  # type: Dict[str, Any]
 
         if filters:
-            filter_clause = []
-            for key, values in filters.items():
-                filter_clause.append(
-                    {
-                        "terms": {key: values}
-                    }
-                )
-            body["query"]["bool"]["filter"] = filter_clause
-        result = scan(self.client, query=body, index=index)
+            body["query"]["bool"]["filter"] = _get_filter_clause(filters)
+        result = scan(self.client, query=body, index=index, _source_excludes=source_excludes)
 
         return result
 
@@ -269,38 +513,94 @@ class ElasticsearchDocumentStore(BaseDocumentStore):
         custom_query: Optional[str] = None,
         index: Optional[str] = None,
     ) -> List[Document]:
+        return self.query_batch([query], filters=filters, top_k=top_k, custom_query=custom_query, index=index)[0]
+
+    def query_batch(
+        self,
+        queries: List[Optional[str]],
+        filters: Optional[Dict[str, List[str]]] = None,
+        top_k: int = 10,
+        custom_query: Optional[str] = None,
+        index: Optional[str] = None,
+    ) -> List[List[Document]]:
+        """
+        Run multiple queries in a single request to Elasticsearch (via the multi search API).
+        See `query()` for the search that is performed per query.
+
+        :param queries: List of query strings. A query of None only applies the filters.
+        :param filters: Filters applied to all queries, e.g. {"name": ["some", "more"], "category": ["only_one"]}
+        :param top_k: How many documents to return per query
+        :param custom_query: Custom Elasticsearch query template (see `ElasticsearchRetriever`)
+        :param index: Name of the index to search. If None, the DocumentStore's default index (self.index) will be used.
+        :return: List of documents for each query
+        """
+        if index is None:
+            index = self.index
+
+        bodies = [self._get_query_body(query, filters, top_k, custom_query) for query in queries]
+        results = self._msearch(index, bodies)
+        return [[self._convert_es_hit_to_document(hit) for hit in result] for result in results]
+
+    def query_raw(
+        self,
+        query: Optional[str],
+        filters: Optional[Dict[str, List[str]]] = None,
+        top_k: int = 10,
+        custom_query: Optional[str] = None,
+        index: Optional[str] = None,
+    ) -> List[RawHit]:
+        return self.query_batch_raw([query], filters=filters, top_k=top_k, custom_query=custom_query, index=index)[0]
+
+    def query_batch_raw(
+        self,
+        queries: List[Optional[str]],
+        filters: Optional[Dict[str, List[str]]] = None,
+        top_k: int = 10,
+        custom_query: Optional[str] = None,
+        index: Optional[str] = None,
+    ) -> List[List[RawHit]]:
+        """
+        Same as `query_batch()`, but returns lightweight (id, score, text) tuples instead of Document objects.
+        Only the text field is fetched from Elasticsearch.
 
+        :return: List of (id, score, text) tuples for each query
+        """
         if index is None:
             index = self.index
 
+        bodies = [self._get_query_body(query, filters, top_k, custom_query) for query in queries]
+        for body in bodies:
+            body["_source"] = [self.text_field]
+        return [self._convert_es_hits_to_raw(result) for result in self._msearch(index, bodies)]
+
+    def _get_query_body(
+        self,
+        query: Optional[str],
+        filters: Optional[Dict[str, List[str]]],
+        top_k: int,
+        custom_query: Optional[str]
+    ) -> Dict[str, Any]:
         # Naive retrieval without BM25, only filtering
         if query is None:
             body = {"query":
                         {"bool": {"must":
                                       {"match_all": {}}}}}  # type: Dict[str, Any]
             if filters:
-                filter_clause = []
-                for key, values in filters.items():
-                    filter_clause.append(
-                        {
-                            "terms": {key: values}
-                        }
-                    )
-                body["query"]["bool"]["filter"] = filter_clause
+                body["query"]["bool"]["filter"] = _get_filter_clause(filters)
 
         # Retrieval via custom query
         elif custom_query:  # substitute placeholder for question and filters for the custom_query template string
-            template = Template(custom_query)
+            template = _get_query_template(custom_query)
             # replace all "${question}" placeholder(s) with query
             substitutions = {"question": query}
             # For each filter we got passed, we'll try to find & replace the corresponding placeholder in the template
             # Example: filters={"years":[2018]} => replaces {$years} in custom_query with '[2018]'
             if filters:
                 for key, values in filters.items():
-                    values_str = json.dumps(values)
+                    values_str = orjson.dumps(values).decode()
                     substitutions[key] = values_str
             custom_query_json = template.substitute(**substitutions)
-            body = json.loads(custom_query_json)
+            body = orjson.loads(custom_query_json)
             # add top_k
             body["size"] = str(top_k)
 
@@ -316,109 +616,319 @@ class ElasticsearchDocumentStore(BaseDocumentStore):
             }
 
             if filters:
-                filter_clause = []
-                for key, values in filters.items():
-                    if type(values) != list:
-                        raise ValueError(f'Wrong filter format for key "{key}": Please provide a list of allowed values for each key. '
-                                         'Example: {"name": ["some", "more"], "category": ["only_one"]} ')
-                    filter_clause.append(
-                        {
-                            "terms": {key: values}
-                        }
-                    )
-                body["query"]["bool"]["filter"] = filter_clause
+                body["query"]["bool"]["filter"] = _get_filter_clause(filters)
 
         if self.excluded_meta_data:
             body["_source"] = {"excludes": self.excluded_meta_data}
 
         logger.debug(f"Retriever query: {body}")
-        result = self.client.search(index=index, body=body)["hits"]["hits"]
-
-        documents = [self._convert_es_hit_to_document(hit) for hit in result]
-        return documents
+        return body
 
     def query_by_embedding(self,
-                           query_emb: np.array,
+                           query_emb: Union[List[float], np.ndarray],
                            filters: Optional[dict] = None,
                            top_k: int = 10,
                            index: Optional[str] = None) -> List[Document]:
+        return self.query_by_embedding_batch([query_emb], filters=filters, top_k=top_k, index=index)[0]
+
+    def query_by_embedding_batch(self,
+                                 query_embs: Embeddings,
+                                 filters: Optional[dict] = None,
+                                 top_k: int = 10,
+                                 index: Optional[str] = None) -> List[List[Document]]:
+        """
+        Find the most similar documents for multiple query embeddings in a single request to Elasticsearch
+        (via the multi search API).
+
+        :param query_embs: Query embeddings, either as list of vectors or as matrix with one row per query
+        :param filters: Filters applied to all queries, e.g. {"name": ["some", "more"], "category": ["only_one"]}
+        :param top_k: How many documents to return per query
+        :param index: Name of the index to search. If None, the DocumentStore's default index (self.index) will be used.
+        :return: List of documents for each query embedding
+        """
         if index is None:
             index = self.index
 
         if not self.embedding_field:
             raise RuntimeError("Please specify arg `embedding_field` in ElasticsearchDocumentStore()")
-        else:
-            # +1 in cosine similarity to avoid negative numbers
-            body= {
-                "size": top_k,
-                "query": {
-                    "script_score": {
-                        "query": {"match_all": {}},
-                        "script": {
-                            "source": f"cosineSimilarity(params.query_vector,doc['{self.embedding_field}']) + 1.0",
-                            "params": {
-                                "query_vector": query_emb.tolist()
-                            }
-                        }
-                    }
-                }
-            }  # type: Dict[str,Any]
+        query_embs = np.asarray(query_embs, dtype=np.float32)
+
+        # kNN search scores cosine / dot_product similarity as (1 + similarity) / 2. Map it back to the plain similarity
+        # to be consistent with the other DocumentStores.
+        rescale_scores = self.similarity in ("cosine", "dot_product")
+
+        results = [[] for _ in query_embs]  # type: List[List[Document]]
+        cache_keys = [None] * len(query_embs)  # type: List[Optional[tuple]]
+        # positions of the queries that can't be answered from the cache
+        pending = []
+        for i, query_emb in enumerate(query_embs):
+            cached_documents = None
+            if self.query_cache_size:
+                cache_key = self._get_query_cache_key(query_emb, filters, top_k, index)
+                cache_keys[i] = cache_key
+                cached_documents = self._lookup_query_cache(cache_key, query_emb)
+            if cached_documents is None:
+                pending.append(i)
+            else:
+                results[i] = cached_documents
+
+        if pending:
+            bodies = [self._get_query_by_embedding_body(query_embs[i], filters, top_k, index) for i in pending]
+            for i, result in zip(pending, self._msearch(index, bodies)):
+                documents = [self._convert_es_hit_to_document(hit) for hit in result]
+                if rescale_scores:
+                    for doc in documents:
+                        if doc.query_score is not None:
+                            doc.query_score = doc.query_score * 2 - 1
+
+                pending_cache_key = cache_keys[i]
+                if pending_cache_key is not None:
+                    self._add_to_query_cache(pending_cache_key, query_embs[i], documents)
+                results[i] = documents
+
+        return results
+
+    def query_by_embedding_raw(self,
+                               query_emb: np.ndarray,
+                               filters: Optional[dict] = None,
+                               top_k: int = 10,
+                               index: Optional[str] = None) -> List[RawHit]:
+        return self.query_by_embedding_batch_raw([query_emb], filters=filters, top_k=top_k, index=index)[0]
+
+    def query_by_embedding_batch_raw(self,
+                                     query_embs: Embeddings,
+                                     filters: Optional[dict] = None,
+                                     top_k: int = 10,
+                                     index: Optional[str] = None) -> List[List[RawHit]]:
+        """
+        Same as `query_by_embedding_batch()`, but returns lightweight (id, score, text) tuples instead of Document
+        objects. Only the text field is fetched from Elasticsearch and the query cache is bypassed.
 
-            if filters:
-                filter_clause = []
-                for key, values in filters.items():
-                    filter_clause.append(
-                        {
-                            "terms": {key: values}
-                        }
-                    )
-                body["query"]["bool"]["filter"] = filter_clause
+        :return: List of (id, score, text) tuples for each query embedding
+        """
+        if index is None:
+            index = self.index
 
-            if self.excluded_meta_data:
-                body["_source"] = {"excludes": self.excluded_meta_data}
+        if not self.embedding_field:
+            raise RuntimeError("Please specify arg `embedding_field` in ElasticsearchDocumentStore()")
+        query_embs = np.asarray(query_embs, dtype=np.float32)
 
-            logger.debug(f"Retriever query: {body}")
-            result = self.client.search(index=index, body=body, request_timeout=300)["hits"]["hits"]
+        bodies = [self._get_query_by_embedding_body(query_emb, filters, top_k, index) for query_emb in query_embs]
+        for body in bodies:
+            body["_source"] = [self.text_field]
+        # see query_by_embedding_batch() for the rescaling of the scores
+        rescale_scores = self.similarity in ("cosine", "dot_product")
+        return [self._convert_es_hits_to_raw(result, rescale_scores=rescale_scores)
+                for result in self._msearch(index, bodies)]
 
-            documents = [self._convert_es_hit_to_document(hit, score_adjustment=-1) for hit in result]
-            return documents
+    def _get_query_by_embedding_body(
+        self,
+        query_emb: np.ndarray,
+        filters: Optional[dict],
+        top_k: int,
+        index: str
+    ) -> Dict[str, Any]:
+        # approximate kNN search on the HNSW graph of the embedding field (requires Elasticsearch >= 8.0)
+        body = {
+            "size": top_k,
+            "knn": {
+                "field": self.embedding_field,
+                "query_vector": self._embeddings_to_payload([query_emb], index)[0],
+                "k": top_k,
+                "num_candidates": min(max(top_k * 10, 100), 10_000),
+            }
+        }  # type: Dict[str,Any]
 
-    def _convert_es_hit_to_document(self, hit: dict, score_adjustment: int = 0) -> Document:
+        if filters:
+            body["knn"]["filter"] = _get_filter_clause(filters)
+
+        if self.excluded_meta_data:
+            body["_source"] = {"excludes": self.excluded_meta_data}
+
+        logger.debug(f"Retriever query: {body}")
+        return body
+
+    def _msearch(self, index: str, bodies: List[Dict[str, Any]]) -> List[List[dict]]:
+        if not bodies:
+            return []
+        header = {"index": index, "request_cache": True}  # type: Dict[str, Any]
+        if self.preference:
+            header["preference"] = self.preference
+        request = []  # type: List[Dict[str, Any]]
+        for body in bodies:
+            request.append(header)
+            request.append(body)
+        responses = self.client.msearch(body=request, request_timeout=300)["responses"]
+
+        results = []
+        for response in responses:
+            # errors of single searches don't fail the whole request, so we raise them here like the client would
+            if "error" in response:
+                status = response.get("status", 500)
+                exception_class = cast(Type[TransportError], HTTP_EXCEPTIONS.get(status, TransportError))
+                raise exception_class(status, response["error"].get("type"), response["error"])
+            results.append(response["hits"]["hits"])
+        return results
+
+    def _get_query_cache_key(self, query_emb: np.ndarray, filters: Optional[dict], top_k: int, index: str) -> tuple:
+        # Similar embeddings mostly share the signs of their components (random projection hashing),
+        # so these are used as bucket for the embedding
+        filters_key = orjson.dumps(filters, option=orjson.OPT_SORT_KEYS) if filters else None
+        return index, top_k, filters_key, np.sign(query_emb).astype(np.int8).tobytes()
+
+    def _lookup_query_cache(self, cache_key: tuple, query_emb: np.ndarray) -> Optional[List[Document]]:
+        with self._query_cache_lock:
+            cached = self._query_cache.get(cache_key)
+            if cached is None:
+                return None
+            cached_emb, cached_documents = cached
+            if np.dot(cached_emb, query_emb) / np.linalg.norm(query_emb) < self.query_cache_threshold:
+                return None
+            self._query_cache.move_to_end(cache_key)
+        # hand out copies, so that callers modifying the documents don't alter the cached ones
+        return [_copy_without_embedding(doc) for doc in cached_documents]
+
+    def _add_to_query_cache(self, cache_key: tuple, query_emb: np.ndarray, documents: List[Document]):
+        norm = np.linalg.norm(query_emb)
+        if not norm:
+            return
+        # the embeddings of the documents would make up most of the cache's memory
+        cached_documents = [_copy_without_embedding(doc) for doc in documents]
+        with self._query_cache_lock:
+            self._query_cache[cache_key] = (query_emb / norm, cached_documents)
+            self._query_cache.move_to_end(cache_key)
+            if len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+
+    def _clear_query_cache(self):
+        with self._query_cache_lock:
+            self._query_cache.clear()
+
+    def _convert_es_hit_to_document(self, hit: dict) -> Document:
+        source = hit["_source"]
+        excluded_keys = self._excluded_source_keys
         # We put all additional data of the doc into meta_data and return it in the API
-        meta_data = {k:v for k,v in hit["_source"].items() if k not in (self.text_field, self.faq_question_field, self.embedding_field, "tags")}
+        meta_data = {k: v for k, v in source.items() if k not in excluded_keys}
         meta_data["name"] = meta_data.pop(self.name_field, None)
 
         document = Document(
             id=hit["_id"],
-            text=hit["_source"].get(self.text_field),
+            text=source.get(self.text_field),
             meta=meta_data,
-            query_score=hit["_score"] + score_adjustment if hit["_score"] else None,
-            question=hit["_source"].get(self.faq_question_field),
-            tags=hit["_source"].get("tags"),
-            embedding=hit["_source"].get(self.embedding_field)
+            query_score=hit["_score"],
+            question=source.get(self.faq_question_field),
+            tags=source.get("tags"),
+            embedding=source.get(self.embedding_field)
         )
         return document
 
+    def _convert_es_hits_to_raw(self, hits: List[dict], rescale_scores: bool = False) -> List[RawHit]:
+        # Lightweight alternative to _convert_es_hit_to_document() for callers that only need id, score and text
+        get_id_and_score = itemgetter("_id", "_score")
+        text_field = self.text_field
+        raw_hits = []
+        for hit in hits:
+            _id, score = get_id_and_score(hit)
+            if rescale_scores and score is not None:
+                score = score * 2 - 1
+            raw_hits.append((_id, score, hit["_source"].get(text_field)))
+        return raw_hits
+
+    def _embeddings_to_payload(
+        self,
+        embeddings: Embeddings,
+        index: str
+    ) -> np.ndarray:
+        # Elasticsearch stores and compares the vectors with float32 precision (or less, if quantized).
+        # The OrjsonSerializer writes float32 arrays directly with the shortest representation of each value.
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if self.vector_precision == "binary":
+            # one bit per dimension (positive or not), packed into signed bytes as expected by Elasticsearch
+            return np.packbits(embeddings > 0, axis=-1).view(np.int8)
+        if self.vector_precision == "int8":
+            ranges = self._get_int8_ranges(index)
+            steps = (ranges[1] - ranges[0]) / 255
+            steps[steps == 0] = 1
+            quantized = np.round((embeddings - ranges[0]) / steps) - 128
+            return np.clip(quantized, -128, 127).astype(np.int8)
+        return embeddings
+
+    def _get_int8_ranges(self, index: str) -> np.ndarray:
+        # (min, max) values per dimension that are mapped to the int8 range
+        if index not in self._int8_ranges and not self._load_int8_ranges(index):
+            raise RuntimeError(f"No int8 calibration found for index '{index}'. "
+                               f"Write embeddings to the index (e.g. via update_embeddings()) before querying it.")
+        return self._int8_ranges[index]
+
+    def _load_int8_ranges(self, index: str) -> bool:
+        mapping = self.client.indices.get_mapping(index=index)[index]["mappings"]
+        ranges = mapping.get("_meta", {}).get("int8_ranges")
+        if ranges is None:
+            return False
+        self._int8_ranges[index] = np.asarray(ranges, dtype=np.float32)
+        return True
+
+    def _calibrate_int8_ranges(
+        self,
+        index: str,
+        samples: List[Tuple[Any, Any]],
+        recalibrate: bool = False
+    ) -> List[Tuple[Any, Any]]:
+        """
+        Calibrate the int8 ranges of an index on the (id, embedding) samples of the docs about to be written and store
+        them in the index mapping. This only happens once per index, unless `recalibrate` is set.
+        Until enough embeddings were seen, the range [-1, 1] of normalized embeddings is used, but only kept in memory.
+
+        :return: (id, embedding) of docs that were written with the [-1, 1] range before and need to be quantized again
+        """
+        if recalibrate:
+            # the docs written before are about to get new embeddings anyway
+            self._int8_uncalibrated.pop(index, None)
+        elif index not in self._int8_uncalibrated and (index in self._int8_ranges or self._load_int8_ranges(index)):
+            return []
+
+        written_before = self._int8_uncalibrated.pop(index, [])
+        samples = written_before + samples
+        if len(samples) < MIN_INT8_CALIBRATION_SIZE:
+            self._int8_uncalibrated[index] = samples
+            self._int8_ranges[index] = np.tile(np.array([[-1.0], [1.0]], dtype=np.float32), (1, self.embedding_dim))
+            return []
+
+        embeddings = np.array([emb for _, emb in samples[:1000]], dtype=np.float32)
+        ranges = np.stack([embeddings.min(axis=0), embeddings.max(axis=0)])
+        # a dimension without any spread would map all of its values to the same int8 value
+        constant = ranges[0] == ranges[1]
+        ranges[0, constant] -= 1
+        ranges[1, constant] += 1
+        self.client.indices.put_mapping(index=index, body={"_meta": {"int8_ranges": ranges}})
+        self._int8_ranges[index] = ranges
+        return written_before
+
     def describe_documents(self, index=None):
         if index is None:
             index = self.index
-        docs = self.get_all_documents(index)
-
-        l = [len(d.text) for d in docs]
-        stats = {"count": len(docs),
-                 "chars_mean": np.mean(l),
-                 "chars_max": max(l),
-                 "chars_min": min(l),
-                 "chars_median": np.median(l),
+
+        # Only fetch the text field and collect the lengths in a single numpy array while scrolling
+        result = scan(self.client, index=index, query={"query": {"match_all": {}}}, _source_includes=[self.text_field])
+        lengths = np.fromiter((len(hit["_source"].get(self.text_field) or "") for hit in result), dtype=np.int64)
+
+        stats = {"count": len(lengths),
+                 "chars_mean": np.mean(lengths),
+                 "chars_max": lengths.max(),
+                 "chars_min": lengths.min(),
+                 "chars_median": np.median(lengths),
                  }
         return stats
 
-    def update_embeddings(self, retriever, index=None):
+    def update_embeddings(self, retriever, index=None, batch_size: int = 10_000):
         """
         Updates the embeddings in the the document store using the encoding model specified in the retriever.
         This can be useful if want to add or change the embeddings for your documents (e.g. after changing the retriever config).
 
         :param retriever: Retriever
+        :param index: Index name to update. If not supplied, self.index will be used.
+        :param batch_size: Number of docs that are embedded and written back to Elasticsearch at once.
+                           Keeps the memory footprint bounded for huge document collections.
         :return: None
         """
         if index is None:
@@ -427,29 +937,91 @@ class ElasticsearchDocumentStore(BaseDocumentStore):
         if not self.embedding_field:
             raise RuntimeError("Specify the arg `embedding_field` when initializing ElasticsearchDocumentStore()")
 
-        docs = self.get_all_documents(index)
-        passages = [d.text for d in docs]
-
-        #TODO Index embeddings every X batches to avoid OOM for huge document collections
-        logger.info(f"Updating embeddings for {len(passages)} docs ...")
-        embeddings = retriever.embed_passages(passages)
+        logger.info(f"Updating embeddings for {self.get_document_count(index=index)} docs ...")
+
+        # The three stages run in parallel: while batch N is written to Elasticsearch, batch N+1 is embedded
+        # (in this thread) and the next batches are fetched from Elasticsearch.
+        batches: queue.Queue = queue.Queue(maxsize=2)
+        stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            producer = executor.submit(self._scan_text_batches, index, batch_size, batches, stop)
+            write_future = None
+            try:
+                while True:
+                    batch = batches.get()
+                    if batch is None:
+                        break
+                    batch_ids, batch_texts = batch
+                    # the new embeddings may come from another model, so the int8 ranges are calibrated on them anew
+                    batch_ids, payload = self._embed_batch(retriever, batch_ids, batch_texts, index,
+                                                           recalibrate=write_future is None)
+                    # wait for the previous batch, so that at most one batch is written at a time
+                    if write_future is not None:
+                        write_future.result()
+                    write_future = executor.submit(self._write_embeddings_batch, batch_ids, payload, index)
+                if write_future is not None:
+                    write_future.result()
+                # raise errors that happened while scrolling
+                producer.result()
+            finally:
+                stop.set()
+        self.client.indices.refresh(index=index)
+        self._clear_query_cache()
+
+    def _scan_text_batches(self, index: str, batch_size: int, batches: queue.Queue, stop: threading.Event):
+        # Puts batches of (ids, texts) into the queue, followed by None when all docs have been fetched.
+        # Only fetch the text of the docs. The scroll is kept alive long enough to embed one batch between two pages.
+        try:
+            result = scan(self.client, index=index, query={"query": {"match_all": {}}},
+                          _source_includes=[self.text_field], scroll="30m")
+            batch_ids = []
+            batch_texts = []
+            for hit in result:
+                batch_ids.append(hit["_id"])
+                batch_texts.append(hit["_source"].get(self.text_field))
+                if len(batch_texts) == batch_size:
+                    if not _put_until_stopped(batches, (batch_ids, batch_texts), stop):
+                        return
+                    batch_ids = []
+                    batch_texts = []
+            if batch_texts:
+                _put_until_stopped(batches, (batch_ids, batch_texts), stop)
+        finally:
+            _put_until_stopped(batches, None, stop)
+
+    def _embed_batch(
+        self,
+        retriever,
+        ids: List[str],
+        texts: List[str],
+        index: str,
+        recalibrate: bool = False
+    ) -> Tuple[List[str], np.ndarray]:
+        embeddings = retriever.embed_passages(texts)
 
-        assert len(docs) == len(embeddings)
+        assert len(ids) == len(embeddings)
 
         if embeddings[0].shape[0] != self.embedding_dim:
             raise RuntimeError(f"Embedding dim. of model ({embeddings[0].shape[0]})"
                                f" doesn't match embedding dim. in documentstore ({self.embedding_dim})."
                                "Specify the arg `embedding_dim` when initializing ElasticsearchDocumentStore()")
-        doc_updates = []
-        for doc, emb in zip(docs, embeddings):
-            update = {"_op_type": "update",
-                      "_index": index,
-                      "_id": doc.id,
-                      "doc": {self.embedding_field: emb.tolist()},
-                      }
-            doc_updates.append(update)
-
-        bulk(self.client, doc_updates, request_timeout=300)
+        if self.vector_precision == "int8":
+            requantize = self._calibrate_int8_ranges(index, list(zip(ids, embeddings)), recalibrate=recalibrate)
+            if requantize:
+                ids = ids + [_id for _id, _ in requantize]
+                embeddings = list(embeddings) + [emb for _, emb in requantize]
+        return ids, self._embeddings_to_payload(embeddings, index)
+
+    def _write_embeddings_batch(self, ids: List[str], payload: np.ndarray, index: str):
+        doc_updates = (
+            {"_op_type": "update",
+             "_index": index,
+             "_id": _id,
+             "doc": {self.embedding_field: emb},
+             }
+            for _id, emb in zip(ids, payload)
+        )
+        self._bulk(doc_updates)
 
     def add_eval_data(self, filename: str, doc_index: str = "eval_document", label_index: str = "label"):
         """
@@ -474,9 +1046,10 @@ class ElasticsearchDocumentStore(BaseDocumentStore):
         :param index: index name
         :return: None
         """
-        self.client.delete_by_query(index=index, body={"query": {"match_all": {}}}, ignore=[404])
-        # We want to be sure that all docs are deleted before continuing (delete_by_query doesn't support wait_for)
-        time.sleep(1)
+        # Block until all docs are deleted and the deletion is visible to searches
+        self.client.delete_by_query(index=index, body={"query": {"match_all": {}}}, refresh=True,
+                                    wait_for_completion=True, ignore=[404])
+        self._clear_query_cache()
 
 
 
@@ -29,11 +29,12 @@ def elasticsearch_fixture(elasticsearch_dir):
         client.info()
     except:
         print("Downloading and starting an Elasticsearch instance for the tests ...")
-        thetarfile = "https://artifacts.elastic.co/downloads/elasticsearch/elasticsearch-7.6.1-linux-x86_64.tar.gz"
+        thetarfile = "https://artifacts.elastic.co/downloads/elasticsearch/elasticsearch-8.16.1-linux-x86_64.tar.gz"
         ftpstream = urllib.request.urlopen(thetarfile)
         thetarfile = tarfile.open(fileobj=ftpstream, mode="r|gz")
         thetarfile.extractall(path=elasticsearch_dir)
-        es_server = Popen([elasticsearch_dir / "elasticsearch-7.6.1/bin/elasticsearch"], stdout=PIPE, stderr=STDOUT)
+        es_server = Popen([elasticsearch_dir / "elasticsearch-8.16.1/bin/elasticsearch", "-E", "xpack.security.enabled=false"],
+                          stdout=PIPE, stderr=STDOUT)
         time.sleep(40)
 
 
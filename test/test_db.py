@@ -1,7 +1,12 @@
+import numpy as np
 import pytest
+import threading
 import time
 
+from elasticsearch import Elasticsearch
+
 from haystack.database.base import Document
+from haystack.database.elasticsearch import ElasticsearchDocumentStore
 
 
 def test_get_all_documents(document_store_with_docs):
@@ -21,3 +26,230 @@ def test_elasticsearch_update_meta(document_store_with_docs):
     document_store_with_docs.update_document_meta(document.id, meta={"meta_field": "updated_meta"})
     updated_document = document_store_with_docs.query(query=None, filters={"name": ["filename1"]})[0]
     assert updated_document.meta["meta_field"] == "updated_meta"
+
+
+@pytest.mark.parametrize("document_store_with_docs", [("elasticsearch")], indirect=True)
+def test_elasticsearch_get_all_documents_generator(document_store_with_docs):
+    documents = document_store_with_docs.get_all_documents_generator(filters={"name": ["filename1"]})
+    assert not isinstance(documents, list)
+    documents = list(documents)
+    assert len(documents) == 1
+    assert documents[0].text == "My name is Carla and I live in Berlin"
+
+    document_store_with_docs.write_documents([
+        {"text": "My name is Jim and I live in Dublin", "embedding": np.random.rand(768).astype(np.float32),
+         "meta": {"name": "filename4"}}
+    ])
+    documents = list(document_store_with_docs.get_all_documents_generator(filters={"name": ["filename4"]}))
+    assert len(documents) == 1
+    # embeddings are excluded from the _source by default
+    assert documents[0].embedding is None
+    documents = list(document_store_with_docs.get_all_documents_generator(filters={"name": ["filename4"]},
+                                                                          include_embedding=True))
+    assert len(documents) == 1
+    assert len(documents[0].embedding) == 768
+
+
+@pytest.mark.parametrize("document_store_with_docs", [("elasticsearch")], indirect=True)
+def test_elasticsearch_describe_documents(document_store_with_docs):
+    stats = document_store_with_docs.describe_documents()
+    assert stats["count"] == 3
+    assert stats["chars_min"] == len("My name is Carla and I live in Berlin")
+    assert stats["chars_max"] == len("My name is Christelle and I live in Paris")
+
+
+def _get_embedding_document_store(**kwargs):
+    documents = [
+        {"text": "Doc one", "embedding": [1.0, 0.0, 0.0, 0.0], "meta": {"name": "filename1"}},
+        {"text": "Doc two", "embedding": [0.0, 1.0, 0.0, 0.0], "meta": {"name": "filename2"}},
+        {"text": "Doc three", "embedding": [-1.0, 0.0, 0.0, 0.0], "meta": {"name": "filename3"}},
+    ]
+    Elasticsearch().indices.delete(index="haystack_test_embedding", ignore=[404])
+    document_store = ElasticsearchDocumentStore(index="haystack_test_embedding", embedding_dim=4, **kwargs)
+    document_store.write_documents(documents)
+    return document_store
+
+
+def test_elasticsearch_query_by_embedding(elasticsearch_fixture):
+    document_store = _get_embedding_document_store()
+
+    results = document_store.query_by_embedding(np.array([1.0, 0.0, 0.0, 0.0]), top_k=3)
+    assert [d.text for d in results] == ["Doc one", "Doc two", "Doc three"]
+    # cosine scores of Elasticsearch are mapped back to [-1, 1]
+    assert results[0].query_score == pytest.approx(1.0, abs=0.05)
+    assert results[1].query_score == pytest.approx(0.0, abs=0.05)
+    assert results[2].query_score == pytest.approx(-1.0, abs=0.05)
+
+    results = document_store.query_by_embedding(np.array([1.0, 0.0, 0.0, 0.0]), top_k=3,
+                                                filters={"name": ["filename2", "filename3"]})
+    assert [d.text for d in results] == ["Doc two", "Doc three"]
+
+
+def test_elasticsearch_query_by_embedding_batch(elasticsearch_fixture):
+    document_store = _get_embedding_document_store()
+
+    query_embs = np.array([[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [-1.0, 0.0, 0.0, 0.0]])
+    results = document_store.query_by_embedding_batch(query_embs, top_k=1)
+    assert [[d.text for d in documents] for documents in results] == [["Doc one"], ["Doc two"], ["Doc three"]]
+    assert all(documents[0].query_score == pytest.approx(1.0, abs=0.05) for documents in results)
+
+    # each query of the batch yields the same results as a single query
+    results = document_store.query_by_embedding_batch(list(query_embs), top_k=3, filters={"name": ["filename1"]})
+    assert len(results) == 3
+    for query_emb, documents in zip(query_embs, results):
+        single_documents = document_store.query_by_embedding(query_emb, top_k=3, filters={"name": ["filename1"]})
+        assert [d.id for d in documents] == [d.id for d in single_documents]
+
+
+def test_elasticsearch_query_by_embedding_raw(elasticsearch_fixture):
+    document_store = _get_embedding_document_store()
+
+    documents = document_store.query_by_embedding(np.array([1.0, 0.0, 0.0, 0.0]), top_k=3)
+    res = document_store.query_by_embedding_raw(np.array([1.0, 0.0, 0.0, 0.0]), top_k=3)
+    assert res == [(str(d.id), d.query_score, d.text) for d in documents]
+
+    res = document_store.query_by_embedding_batch_raw(np.array([[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0]]), top_k=1,
+                                                      filters={"name": ["filename1", "filename2"]})
+    assert [hits[0][2] for hits in res] == ["Doc one", "Doc two"]
+    assert res[1][0][1] == pytest.approx(1.0, abs=0.05)
+
+
+def test_elasticsearch_query_cache(elasticsearch_fixture, monkeypatch):
+    document_store = _get_embedding_document_store(query_cache_size=10)
+    searches = []
+    msearch = document_store._msearch
+    monkeypatch.setattr(document_store, "_msearch", lambda index, bodies: searches.append(bodies) or msearch(index, bodies))
+
+    results = document_store.query_by_embedding(np.array([1.0, 0.1, 0.1, 0.1]), top_k=3)
+    assert len(searches) == 1
+
+    # hit for a query embedding above the similarity threshold
+    cached_results = document_store.query_by_embedding(np.array([1.0, 0.12, 0.1, 0.1]), top_k=3)
+    assert len(searches) == 1
+    assert [d.id for d in cached_results] == [d.id for d in results]
+    assert all(d.embedding is None for d in cached_results)
+
+    # modifying returned documents doesn't alter the cached ones
+    cached_results[0].meta["name"] = "changed"
+    cached_results = document_store.query_by_embedding(np.array([1.0, 0.1, 0.1, 0.1]), top_k=3)
+    assert cached_results[0].meta["name"] == "filename1"
+    assert len(searches) == 1
+
+    # misses for a query embedding below the threshold and for other filters
+    document_store.query_by_embedding(np.array([1.0, 0.8, 0.1, 0.1]), top_k=3)
+    assert len(searches) == 2
+    document_store.query_by_embedding(np.array([1.0, 0.8, 0.1, 0.1]), top_k=3, filters={"name": ["filename1"]})
+    assert len(searches) == 3
+
+    # writes clear the cache
+    document_store.write_documents([{"text": "Doc four", "embedding": [1.0, 0.0, 0.0, 0.0], "meta": {"name": "filename4"}}])
+    results = document_store.query_by_embedding(np.array([1.0, 0.8, 0.1, 0.1]), top_k=3)
+    assert len(searches) == 4
+    assert "Doc four" in [d.text for d in results]
+
+
+def test_elasticsearch_vector_precision_int8(elasticsearch_fixture):
+    document_store = _get_embedding_document_store(vector_precision="int8")
+
+    results = document_store.query_by_embedding(np.array([1.0, 0.0, 0.0, 0.0]), top_k=3)
+    assert [d.text for d in results] == ["Doc one", "Doc two", "Doc three"]
+
+    # too few embeddings to calibrate on, so these are quantized within [-1, 1]
+    documents = {d.text: d for d in document_store.get_all_documents(include_embedding=True)}
+    assert documents["Doc one"].embedding[0] == 127
+    assert documents["Doc three"].embedding[0] == -128
+
+    # update_embeddings() calibrates the value ranges on the new embeddings
+    class Retriever:
+        def embed_passages(self, texts):
+            return [np.array([len(text), 101 - len(text), 1, 1], dtype=np.float32) for text in texts]
+
+    document_store.write_documents([{"text": "x" * i} for i in range(1, 101)])
+    document_store.update_embeddings(Retriever())
+    mapping = document_store.client.indices.get_mapping(index="haystack_test_embedding")
+    ranges = mapping["haystack_test_embedding"]["mappings"]["_meta"]["int8_ranges"]
+    # constant dimensions are widened, so that their values don't collapse to a single int8 value
+    assert ranges == [[1.0, 1.0, 0.0, 0.0], [100.0, 100.0, 2.0, 2.0]]
+    results = document_store.query_by_embedding(np.array([100.0, 1.0, 1.0, 1.0]), top_k=1)
+    assert results[0].text == "x" * 100
+
+
+def test_elasticsearch_vector_precision_int8_small_batches(elasticsearch_fixture):
+    Elasticsearch().indices.delete(index="haystack_test_embedding", ignore=[404])
+    document_store = ElasticsearchDocumentStore(index="haystack_test_embedding", embedding_dim=4,
+                                                vector_precision="int8")
+
+    def get_ranges():
+        mapping = document_store.client.indices.get_mapping(index="haystack_test_embedding")
+        return mapping["haystack_test_embedding"]["mappings"].get("_meta", {}).get("int8_ranges")
+
+    for start in range(0, 150, 50):
+        document_store.write_documents([{"text": f"Doc {i}", "embedding": [i, 149 - i, 1, 1]}
+                                        for i in range(start, start + 50)])
+        # the ranges are only calibrated and stored once enough embeddings were written
+        if start == 0:
+            assert get_ranges() is None
+
+    assert get_ranges() == [[0.0, 50.0, 0.0, 0.0], [99.0, 149.0, 2.0, 2.0]]
+    # the docs of the first batch were quantized again with the calibrated ranges
+    documents = {d.text: d for d in document_store.get_all_documents(include_embedding=True)}
+    assert documents["Doc 0"].embedding[:2] == [-128, 127]
+    assert documents["Doc 99"].embedding[:2] == [127, -128]
+
+
+def test_elasticsearch_vector_precision_binary(elasticsearch_fixture):
+    documents = [
+        {"text": "Doc one", "embedding": [1.0] * 8},
+        {"text": "Doc two", "embedding": [1.0] * 4 + [-1.0] * 4},
+        {"text": "Doc three", "embedding": [-1.0] * 8},
+    ]
+    Elasticsearch().indices.delete(index="haystack_test_embedding", ignore=[404])
+    document_store = ElasticsearchDocumentStore(index="haystack_test_embedding", embedding_dim=8,
+                                                vector_precision="binary")
+    document_store.write_documents(documents)
+
+    results = document_store.query_by_embedding(np.array([1.0] * 7 + [-1.0]), top_k=3)
+    assert [d.text for d in results] == ["Doc one", "Doc two", "Doc three"]
+
+    # the bits are stored packed into one int8 value per 8 dimensions
+    documents = {d.text: d for d in document_store.get_all_documents(include_embedding=True)}
+    assert documents["Doc one"].embedding == [-1]
+    assert documents["Doc two"].embedding == [-16]
+    assert documents["Doc three"].embedding == [0]
+
+
+def test_elasticsearch_vector_precision_conflicts():
+    with pytest.raises(ValueError):
+        ElasticsearchDocumentStore(embedding_dim=8, vector_precision="binary", similarity="cosine")
+    with pytest.raises(ValueError):
+        ElasticsearchDocumentStore(vector_precision="int8", quantization="int8_hnsw")
+
+
+def test_elasticsearch_update_embeddings_error(elasticsearch_fixture):
+    document_store = _get_embedding_document_store()
+    document_store.write_documents([{"text": f"Doc {i}"} for i in range(10)])
+
+    class FailingRetriever:
+        def __init__(self):
+            self.calls = 0
+
+        def embed_passages(self, texts):
+            self.calls += 1
+            if self.calls == 2:
+                raise RuntimeError("Embedding failed")
+            return [np.ones(4, dtype=np.float32) for _ in texts]
+
+    # run in a thread to notice if the pipeline hangs instead of failing
+    errors = []
+
+    def update_embeddings():
+        try:
+            document_store.update_embeddings(FailingRetriever(), batch_size=1)
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=update_embeddings)
+    thread.start()
+    thread.join(timeout=60)
+    assert not thread.is_alive()
+    assert [str(e) for e in errors] == ["Embedding failed"]
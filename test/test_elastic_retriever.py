@@ -33,3 +33,27 @@ def test_elasticsearch_retrieval_filters(document_store_with_docs):
     retriever = ElasticsearchRetriever(document_store=document_store_with_docs)
     res = retriever.retrieve(query="Who lives in Berlin?", filters={"name":["filename1"], "meta_field":["test2"]})
     assert len(res) == 0
+
+@pytest.mark.parametrize("document_store_with_docs", [("elasticsearch")], indirect=True)
+def test_elasticsearch_query_batch(document_store_with_docs):
+    res = document_store_with_docs.query_batch(["Who lives in Berlin?", "Who lives in Paris?"], top_k=1)
+    assert len(res) == 2
+    assert res[0][0].text == "My name is Carla and I live in Berlin"
+    assert res[1][0].text == "My name is Christelle and I live in Paris"
+
+@pytest.mark.parametrize("document_store_with_docs", [("elasticsearch")], indirect=True)
+def test_elasticsearch_query_raw(document_store_with_docs):
+    documents = document_store_with_docs.query("Who lives in Berlin?", top_k=1)
+    res = document_store_with_docs.query_raw("Who lives in Berlin?", top_k=1)
+    assert res == [(str(documents[0].id), documents[0].query_score, "My name is Carla and I live in Berlin")]
+
+    res = document_store_with_docs.query_batch_raw(["Who lives in Berlin?", "Who lives in Paris?"], top_k=1)
+    assert [hits[0][2] for hits in res] == ["My name is Carla and I live in Berlin",
+                                            "My name is Christelle and I live in Paris"]
+
+@pytest.mark.parametrize("document_store_with_docs", [("elasticsearch")], indirect=True)
+def test_elasticsearch_query_batch_empty(document_store_with_docs):
+    assert document_store_with_docs.query_batch([]) == []
+    assert document_store_with_docs.query_batch_raw([]) == []
+    assert document_store_with_docs.query_by_embedding_batch([]) == []
+    assert document_store_with_docs.query_by_embedding_batch_raw([]) == []